@@ -12,6 +12,7 @@ Behavior (per lab spec):
 Notes:
   - Timeout is configurable via env var CLIENT_TIMEOUT (seconds), default 20s.
   - Uses GET and expects the server to close the connection (Connection: close).
+  - PNG/PDF bodies are streamed to disk as they arrive, not held in memory.
 """
 import os
 import sys
@@ -19,38 +20,65 @@ import socket
 
 USAGE = "Usage: client.py server_host server_port filename"
 DEFAULT_TIMEOUT = float(os.getenv("CLIENT_TIMEOUT", "20.0"))  # seconds
+RECV_SIZE = 65536
 
 
-def recv_all(sock: socket.socket) -> bytes:
-    """Read until the server closes the connection or a timeout occurs."""
-    chunks = []
+def recv_head(sock: socket.socket):
+    """Read up to the blank line ending the response head; return (head, body_start)."""
+    buf = bytearray()
+    start = 0
     while True:
+        idx = buf.find(b"\r\n\r\n", max(0, start - 3))
+        if idx >= 0:
+            return bytes(buf[:idx]), bytes(buf[idx + 4:])
+        start = len(buf)
         try:
-            b = sock.recv(4096)
+            b = sock.recv(RECV_SIZE)
+        except socket.timeout:
+            break
+        if not b:
+            break
+        buf += b
+    return bytes(buf), b""
+
+
+def recv_all(sock: socket.socket, sink=None) -> bytes:
+    """Read until the server closes the connection or a timeout occurs.
+
+    With a writable binary `sink`, chunks are written there as they arrive
+    (nothing is buffered) and b"" is returned.
+    """
+    buf = bytearray()
+    while True:
+        try:
+            b = sock.recv(RECV_SIZE)
         except socket.timeout:
             # Stop waiting; return what we have (better than hanging forever)
             break
         if not b:
             break
-        chunks.append(b)
-    return b"".join(chunks)
+        if sink is not None:
+            sink.write(b)
+        else:
+            buf += b
+    return bytes(buf)
 
 
 def parse_headers(raw: bytes):
     """Split raw HTTP response into (status_code, headers_dict, body_bytes)."""
     head, _, body = raw.partition(b"\r\n\r\n")
-    lines = head.decode("iso-8859-1", errors="replace").split("\r\n")
-    status_line = lines[0] if lines else ""
-    parts = status_line.split(" ", 2)
+    # Work on bytes; only header names/values are decoded, one per line
+    lines = head.split(b"\r\n")
+    parts = lines[0].split(b" ", 2)
     try:
         code = int(parts[1]) if len(parts) >= 2 else 0
     except ValueError:
         code = 0
     headers = {}
     for line in lines[1:]:
-        if ":" in line:
-            k, v = line.split(":", 1)
-            headers[k.strip().lower()] = v.strip()
+        k, sep, v = line.partition(b":")
+        if sep:
+            headers[k.strip().lower().decode("iso-8859-1")] = v.strip().decode("iso-8859-1")
     return code, headers, body
 
 
@@ -85,14 +113,27 @@ def main():
         f"\r\n"
     ).encode("ascii")
 
-    # Connect, set timeouts for both connect and recv, then read all bytes
+    # Connect, set timeouts for both connect and recv, read the head first
     with socket.create_connection((host, port), timeout=DEFAULT_TIMEOUT) as s:
         s.settimeout(DEFAULT_TIMEOUT)
         s.sendall(req)
-        raw = recv_all(s)
-
-    code, headers, body = parse_headers(raw)
-    ctype = headers.get("content-type", "")
+        head, body = recv_head(s)
+        code, headers, _ = parse_headers(head)
+        ctype = headers.get("content-type", "")
+
+        if code == 200 and is_binary_save(ctype):
+            os.makedirs("downloads", exist_ok=True)
+            # If the request path ends with '/', give a default filename
+            base = os.path.basename(filename) or "index.html"
+            out_path = os.path.join("downloads", base)
+            # Stream the rest of the body straight to disk
+            with open(out_path, "wb") as f:
+                f.write(body)
+                recv_all(s, f)
+            print(f"Saved {ctype} to {out_path}")
+            return
+
+        body += recv_all(s)
 
     if code != 200:
         # Print status and any text body (e.g., 404 / 429) for visibility
@@ -105,16 +146,6 @@ def main():
         print(body.decode("utf-8", errors="replace"))
         return
 
-    if is_binary_save(ctype):
-        os.makedirs("downloads", exist_ok=True)
-        # If the request path ends with '/', give a default filename
-        base = os.path.basename(filename) or "index.html"
-        out_path = os.path.join("downloads", base)
-        with open(out_path, "wb") as f:
-            f.write(body)
-        print(f"Saved {ctype} to {out_path}")
-        return
-
     # Fallback for unknown content types
     print(f"Unknown content-type: {ctype or '(none)'}; bytes={len(body)}")
 
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-import argparse, os, socket, sys, urllib.parse, time, threading, mimetypes
+import argparse, asyncio, datetime, functools, os, socket, stat, sys, urllib.parse, time, mimetypes
 from email.utils import formatdate
+from collections import Counter, OrderedDict
 from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
 
 ALLOWED_MIME = {
     ".html": "text/html; charset=utf-8",
@@ -10,177 +12,436 @@ ALLOWED_MIME = {
 }
 SERVER_NAME = "TinyPy/0.3"
 
+# socket tuning; the kernel caps these at net.core.somaxconn and
+# net.core.wmem_max, so raise those too (e.g. somaxconn=4096, wmem_max=12582912)
+LISTEN_BACKLOG = 4096
+SEND_BUFFER = 4 << 20
 
-hit_counter = {}             # { "/books/sample.pdf": int }
-counter_lock = threading.Lock()
+def wmem_max() -> int:
+    try:
+        with open("/proc/sys/net/core/wmem_max") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+# an explicit SO_SNDBUF switches off Linux send-buffer autotuning (which grows up
+# to tcp_wmem[2], 4 MiB by default), so only pin it when wmem_max won't shrink it
+PIN_SEND_BUFFER = wmem_max() >= SEND_BUFFER
+
+# HTTP/1.1 persistent connections: idle wait for the next request, requests per connection
+KEEPALIVE_TIMEOUT = 5
+KEEPALIVE_MAX = 100
+
+# pre-encoded header lines, built once at import
+SERVER_CLOSE = f"Server: {SERVER_NAME}\r\nConnection: close\r\n".encode("ascii")
+SERVER_KEEP = f"Server: {SERVER_NAME}\r\nConnection: keep-alive\r\n".encode("ascii")
+STATUS_200 = b"HTTP/1.1 200 OK\r\n"
+CTYPE_HEADERS = {ext: f"Content-Type: {v}\r\n".encode("ascii") for ext, v in ALLOWED_MIME.items()}
+CTYPE_HTML = CTYPE_HEADERS[".html"]
+CTYPE_TEXT = b"Content-Type: text/plain\r\n"
+
+# directory listing pieces; rows are %-formatted straight into bytes
+LISTING_HEAD = b"""<!doctype html>
+<meta charset="utf-8"><title>Directory listing for %b</title>
+<h1>Directory listing for %b</h1>
+<table border="1" cellpadding="6" cellspacing="0">
+<tr><th>File / Directory<th>Last Modified<th>Size<th>Hits
+<tr><td><a href="%b">Parent Directory</a><td><td><td>-
+"""
+LISTING_ROW = b'<tr><td><a href="%b">%b</a><td>%b<td>%b<td>%b\n'
+LISTING_FOOT = b"</table>"
+
+date_cache: tuple[int, bytes] = (0, b"")        # (unix second, b"Date: ...\r\n")
 
-# token bucket per IP: {ip: (tokens, last_time)}
-rl_state = {}
-rl_lock = threading.Lock()
+
+# hits per file, sharded by hash(key) so locked updates of different
+# files never queue on the same lock: [(Counter{"/books/sample.pdf": int}, Lock)]
+COUNTER_SHARDS = 16
+hit_shards: list[tuple[Counter[str], asyncio.Lock]] = [(Counter(), asyncio.Lock()) for _ in range(COUNTER_SHARDS)]
+
+# token bucket per IP: {ip: (tokens * TOKEN, last_monotonic_ns)}
+# no lock: the event loop runs every handler on one thread
+rl_state: dict[str, tuple[int, int]] = {}
+TOKEN = 1000 * 1_000_000_000   # one token, in milli-token-nanoseconds
+
+# small hot files kept in memory: {fs_path: (mtime_ns, size, last_modified_line, body)}
+# OrderedDict in LRU order; a changed mtime/size makes the entry stale
+resp_cache: OrderedDict[str, tuple[int, int, bytes, bytes]] = OrderedDict()
+resp_cache_bytes = 0
+CACHE_MAX_ENTRY = 256 * 1024
+CACHE_MAX_TOTAL = 64 * 1024 * 1024
+
+# larger files stay open for sendfile: {fs_path: (file, mtime_ns, size)}, LRU order.
+# Evicted/stale files are simply dropped: a sender still holding one keeps it
+# open, and CPython closes it as soon as the last reference goes.
+fd_cache: OrderedDict[str, tuple[BinaryIO, int, int]] = OrderedDict()
+FD_CACHE_MAX = 64
 
 # ----------------------------------
 
-def http_date():
-    return formatdate(usegmt=True)
-
-def build_response(code, reason, headers=None, body=b""):
-    if headers is None: headers = {}
-    headers.setdefault("Date", http_date())
-    headers.setdefault("Server", SERVER_NAME)
-    headers.setdefault("Connection", "close")
-    if body and "Content-Length" not in headers:
-        headers["Content-Length"] = str(len(body))
-    status = f"HTTP/1.1 {code} {reason}\r\n"
-    head = "".join(f"{k}: {v}\r\n" for k,v in headers.items())
-    return (status + head + "\r\n").encode("iso-8859-1") + body
-
-def safe_join(root, url_path):
-    path = urllib.parse.urlparse(url_path).path
-    path = urllib.parse.unquote(path)
-    rel  = os.path.normpath(path.lstrip("/"))
-    full = os.path.normpath(os.path.join(root, rel))
-    if os.path.commonpath([os.path.abspath(root), full]) != os.path.abspath(root):
+def hit_shard(req_key: str) -> tuple[Counter[str], asyncio.Lock]:
+    return hit_shards[hash(req_key) % COUNTER_SHARDS]
+
+def http_date() -> bytes:
+    # HTTP-date has 1 s resolution, so format at most once per second
+    global date_cache
+    now = int(time.time())
+    if date_cache[0] != now:
+        date_cache = (now, f"Date: {formatdate(now, usegmt=True)}\r\n".encode("ascii"))
+    return date_cache[1]
+
+def build_response(ctype: bytes, body: bytes = b"", length: int | None = None, keep_alive: bool = False) -> bytes:
+    # 200 with a dynamic body; ctype is a pre-encoded header line, length overrides len(body) for HEAD
+    if length is None: length = len(body)
+    return b"".join((STATUS_200, http_date(), SERVER_KEEP if keep_alive else SERVER_CLOSE, ctype,
+                     b"Content-Length: %d\r\n\r\n" % length, body))
+
+# a fixed response serialized ahead of time: (status line, {keep_alive: headers + body after Date})
+Canned = tuple[bytes, dict[bool, bytes]]
+
+def canned_response(code: int, reason: str, ctype: bytes, body: bytes) -> Canned:
+    # fixed responses serialized once, minus the Date line
+    status = f"HTTP/1.1 {code} {reason}\r\n".encode("ascii")
+    rest = ctype + b"Content-Length: %d\r\n\r\n" % len(body) + body
+    return status, {False: SERVER_CLOSE + rest, True: SERVER_KEEP + rest}
+
+def render(canned: Canned, keep_alive: bool = False) -> bytes:
+    status, rest = canned
+    return status + http_date() + rest[keep_alive]
+
+RESP_400 = canned_response(400, "Bad Request", CTYPE_TEXT, b"bad request\n")
+RESP_405 = canned_response(405, "Method Not Allowed", CTYPE_TEXT, b"only GET/HEAD supported\n")
+RESP_429 = canned_response(429, "Too Many Requests", CTYPE_TEXT, b"rate limit\n")
+RESP_404 = canned_response(404, "Not Found", CTYPE_HTML, b"<!doctype html><h1>404 Not Found</h1>")
+RESP_404_TYPE = canned_response(404, "Not Found", CTYPE_HTML, b"<!doctype html><h1>404 Not Found</h1><p>Unknown type</p>")
+
+def parse_request_head(data: bytes) -> tuple[bytes, str, bytes, dict[bytes, bytes]] | None:
+    # -> (method, path, version, {lower-name: value}) with everything but path left as bytes;
+    # bytes.find runs on CPython's memchr/fastsearch, so each scan is one C call per line
+    end = data.find(b"\r\n")
+    line = data if end < 0 else data[:end]
+    sp1 = line.find(b" ")
+    sp2 = line.find(b" ", sp1 + 1)
+    if sp1 <= 0 or sp2 <= sp1 + 1 or sp2 == len(line) - 1 or line.find(b" ", sp2 + 1) >= 0:
+        return None
+    headers: dict[bytes, bytes] = {}
+    pos = end + 2 if end >= 0 else len(data)
+    while pos < len(data):
+        nl = data.find(b"\r\n", pos)
+        stop = len(data) if nl < 0 else nl
+        if stop == pos:
+            break  # blank line ends the head
+        colon = data.find(b":", pos, stop)
+        if colon > pos:
+            headers[data[pos:colon].strip().lower()] = data[colon+1:stop].strip()
+        pos = stop + 2
+    return line[:sp1], line[sp1+1:sp2].decode("iso-8859-1"), line[sp2+1:], headers
+
+def wants_keep_alive(version: bytes, headers: dict[bytes, bytes]) -> bool:
+    # HTTP/1.1 persists unless told to close; HTTP/1.0 only when asked.
+    # A request body would be left unread in the stream, so those connections close.
+    if b"content-length" in headers and headers[b"content-length"] != b"0" or b"transfer-encoding" in headers:
+        return False
+    conn = headers.get(b"connection", b"").lower()
+    if version == b"HTTP/1.1":
+        return b"close" not in conn
+    return b"keep-alive" in conn
+
+def safe_join(root: str, root_sep: str, url_path: str) -> str | None:
+    # root is already absolute and root_sep is root with a trailing separator
+    # (serve() resolves both once)
+    path = url_path
+    if not path.startswith("/"):
+        # absolute-form target (RFC 7230 5.3.2): drop "scheme://authority"
+        scheme_end = path.find("://")
+        if scheme_end >= 0:
+            rest = path[scheme_end + 3:]
+            ends = [i for i in (rest.find("/"), rest.find("?"), rest.find("#")) if i >= 0]
+            path = "/" + rest[min(ends):].lstrip("/") if ends else "/"
+    path = path.partition("?")[0].partition("#")[0]
+    if "%" in path:
+        path = urllib.parse.unquote(path)
+    if "\x00" in path:
+        return None
+    full = os.path.normpath(os.path.join(root, path.lstrip("/")))
+    if full != root and not full.startswith(root_sep):
         return None
     return full
 
-def dir_listing_html(root, req_path, fs_path):
-    rows = []
+@functools.lru_cache(maxsize=4096)
+def fmt_mtime(sec: int) -> bytes:
+    # listings show 1 s resolution, and most entries in a directory repeat across requests
+    return datetime.datetime.fromtimestamp(sec).strftime("%Y-%m-%d %H:%M:%S").encode("ascii")
+
+def dir_listing_html(root: str, req_path: str, fs_path: str) -> bytes:
+    # one stat per entry; is_dir/size/mtime all come from it
     with os.scandir(fs_path) as it:
-        for e in sorted(it, key=lambda x: (not x.is_dir(), x.name.lower())):
-            name = e.name + ("/" if e.is_dir() else "")
-            href = urllib.parse.quote(name)
-            size = "-" if e.is_dir() else f"{e.stat().st_size} B"
-            mtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e.stat().st_mtime))
+        stats = [(e.name, e.stat()) for e in it]
+    entries = [(name, st, stat.S_ISDIR(st.st_mode)) for name, st in stats]
+    entries.sort(key=lambda x: (not x[2], x[0].lower()))
+    base = req_path if req_path.endswith("/") else req_path + "/"
+    rows = []
+    for name, st, is_dir in entries:
+        label = name + "/" if is_dir else name
+        href = urllib.parse.quote(label).encode("ascii")
+        mtime = fmt_mtime(int(st.st_mtime))
+        if is_dir:
+            rows.append(LISTING_ROW % (href, label.encode("utf-8"), mtime, b"-", b"-"))
+        else:
             # hits column (only for files)
-            req_key = (req_path if req_path.endswith("/") else req_path + "/") + e.name
-            hits = hit_counter.get(req_key, 0) if not e.is_dir() else "-"
-            rows.append(f"<tr><td><a href=\"{href}\">{name}</a></td><td>{mtime}</td><td>{size}</td><td>{hits}</td></tr>")
+            req_key = base + name
+            hits = hit_shard(req_key)[0][req_key]
+            rows.append(LISTING_ROW % (href, label.encode("utf-8"), mtime, b"%d B" % st.st_size, b"%d" % hits))
     parent = "/" if req_path == "/" else urllib.parse.quote(os.path.join(req_path, "..")).replace("\\","/")
-    title = f"Directory listing for {req_path}"
-    html = f"""<!doctype html>
-<meta charset="utf-8"><title>{title}</title>
-<h1>{title}</h1>
-<table border="1" cellpadding="6" cellspacing="0">
-<tr><th>File / Directory</th><th>Last Modified</th><th>Size</th><th>Hits</th></tr>
-<tr><td><a href="{parent}">Parent Directory</a></td><td></td><td></td><td>-</td></tr>
-{''.join(rows)}
-</table>"""
-    return html.encode("utf-8")
+    title = req_path.encode("utf-8")
+    return b"".join([LISTING_HEAD % (title, title, parent.encode("ascii")), *rows, LISTING_FOOT])
 
-def token_bucket_allow(ip, rate, burst):
+def token_bucket_allow(ip: str, rate: float, burst: int) -> bool:
     # disabled
     if rate <= 0:
         return True
-    now = time.monotonic()
-    with rl_lock:
-        tokens, last = rl_state.get(ip, (burst, now))
-        # refill
-        tokens = min(burst, tokens + (now - last) * rate)
-        if tokens >= 1.0:
-            tokens -= 1.0
-            rl_state[ip] = (tokens, now)
-            return True
-        rl_state[ip] = (tokens, now)
-        return False
+    # integer math: tokens are kept in milli-token-nanoseconds so the refill
+    # (elapsed_ns * milli-tokens/s) is exact and never rounds away
+    now = time.monotonic_ns()
+    cap = burst * TOKEN
+    tokens, last = rl_state.get(ip, (cap, now))
+    # refill
+    tokens = min(cap, tokens + (now - last) * max(1, round(rate * 1000)))
+    if tokens >= TOKEN:
+        rl_state[ip] = (tokens - TOKEN, now)
+        return True
+    rl_state[ip] = (tokens, now)
+    return False
+
+def cache_get(fs_path: str, st: os.stat_result) -> tuple[int, int, bytes, bytes] | None:
+    entry = resp_cache.get(fs_path)
+    if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+        return None
+    resp_cache.move_to_end(fs_path)
+    return entry
+
+def cache_put(fs_path: str, st: os.stat_result, last_modified: bytes, body: bytes) -> None:
+    global resp_cache_bytes
+    old = resp_cache.pop(fs_path, None)
+    if old is not None:
+        resp_cache_bytes -= len(old[3])
+    resp_cache[fs_path] = (st.st_mtime_ns, st.st_size, last_modified, body)
+    resp_cache_bytes += len(body)
+    while resp_cache_bytes > CACHE_MAX_TOTAL:
+        _, evicted = resp_cache.popitem(last=False)
+        resp_cache_bytes -= len(evicted[3])
+
+def open_for_sendfile(fs_path: str, size: int) -> BinaryIO:
+    # runs on the executor: WILLNEED queues readahead for the whole file and can block
+    f = open(fs_path, "rb")
+    if hasattr(os, "posix_fadvise"):
+        # start readahead now; sendfile walks the file front to back
+        os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+        os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_SEQUENTIAL)
+    return f
+
+async def fd_cache_get(fs_path: str, st: os.stat_result) -> BinaryIO:
+    entry = fd_cache.get(fs_path)
+    if entry is not None and entry[1] == st.st_mtime_ns and entry[2] == st.st_size:
+        fd_cache.move_to_end(fs_path)
+        return entry[0]
+    f = await asyncio.get_running_loop().run_in_executor(None, open_for_sendfile, fs_path, st.st_size)
+    fd_cache[fs_path] = (f, st.st_mtime_ns, st.st_size)
+    fd_cache.move_to_end(fs_path)
+    if len(fd_cache) > FD_CACHE_MAX:
+        fd_cache.popitem(last=False)
+    return f
+
+def read_file(fs_path: str) -> bytes:
+    with open(fs_path, "rb") as f:
+        return f.read()
+
+async def send(writer, data):
+    writer.write(data)
+    await writer.drain()
 
-def handle_request(conn, addr, root, args):
-    conn.settimeout(5)
+async def send_file(writer, f, size):
+    # zero-copy: the kernel moves page-cache pages straight to the socket
+    loop = asyncio.get_running_loop()
+    if writer.transport.is_closing():
+        # client reset after the headers drained; sendfile would raise a bare
+        # RuntimeError("Transport is closing") that handle_conn doesn't expect
+        raise ConnectionResetError("client closed the connection")
     try:
-        data = b""
-        while b"\r\n\r\n" not in data:
-            chunk = conn.recv(4096)
+        # no fallback: asyncio's own fallback seeks and reads the file object,
+        # which is shared between concurrent responses through fd_cache
+        await loop.sendfile(writer.transport, f, 0, size, fallback=False)
+    except asyncio.SendfileNotAvailableError:
+        # no native sendfile for this transport: chunked copy with pread,
+        # which leaves the shared file's position alone
+        fd, offset = f.fileno(), 0
+        while offset < size:
+            chunk = await loop.run_in_executor(None, os.pread, fd, min(65536, size - offset), offset)
             if not chunk: break
-            data += chunk
-    except socket.timeout:
-        return
+            await send(writer, chunk)
+            offset += len(chunk)
+
+def make_file_handler(ctype):
+    # one specialised sender per extension; the header bytes that never change
+    # for that type are joined here, once, instead of per request
+    head = {False: SERVER_CLOSE + ctype, True: SERVER_KEEP + ctype}
+
+    async def handle_file(writer, fs_path, st, send_body, keep):
+        size = st.st_size
+        cached = cache_get(fs_path, st)
+        if cached is not None:
+            _, _, last_modified, body = cached
+        else:
+            last_modified = f"Last-Modified: {formatdate(st.st_mtime, usegmt=True)}\r\n".encode("ascii")
+            body = None
+        prefix = b"".join((STATUS_200, http_date(), head[keep], last_modified, b"Content-Length: %d\r\n\r\n" % size))
+        if not send_body:
+            await send(writer, prefix)
+            return
+
+        # small files: read once, then answer from memory with a single write
+        if body is None and size <= CACHE_MAX_ENTRY:
+            body = await asyncio.get_running_loop().run_in_executor(None, read_file, fs_path)
+            if len(body) == size:
+                cache_put(fs_path, st, last_modified, body)
+            else:
+                body = None  # changed under us; let sendfile honour Content-Length
+        if body is not None:
+            await send(writer, prefix + body)
+            return
+
+        await send(writer, prefix)
+        await send_file(writer, await fd_cache_get(fs_path, st), size)
 
+    return handle_file
+
+FILE_HANDLERS = {ext: make_file_handler(CTYPE_HEADERS[ext]) for ext in ALLOWED_MIME}
+
+async def handle_request(reader, writer, root, root_sep, args, last=False):
+    # serves one request; returns True if the connection should stay open for another
     try:
-        header_text = data.decode("iso-8859-1", errors="replace")
-        request_line = header_text.split("\r\n", 1)[0]
-        method, path, version = request_line.split()
-    except Exception:
-        conn.sendall(build_response(400, "Bad Request", {"Content-Type":"text/plain"}, b"bad request\n"))
-        return
+        # readuntil resumes its search where the previous chunk ended (it keeps
+        # an offset into one growing buffer), so header scanning stays linear
+        data = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return False
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return False  # peer closed between requests
+        data = e.partial
+    except asyncio.LimitOverrunError:
+        data = b""
+
+    parsed = parse_request_head(data)
+    if parsed is None:
+        await send(writer, render(RESP_400))
+        return False
+    method, path, version, req_headers = parsed
+    keep = not last and wants_keep_alive(version, req_headers)
 
     # simulate work
     if args.delay > 0:
-        time.sleep(args.delay)
+        await asyncio.sleep(args.delay)
 
     # HEAD allowed
-    if method not in ("GET","HEAD"):
-        conn.sendall(build_response(405,"Method Not Allowed",{"Content-Type":"text/plain"}, b"only GET/HEAD supported\n"))
-        return
-    send_body = (method == "GET")
+    if method != b"GET" and method != b"HEAD":
+        await send(writer, render(RESP_405))
+        return False
+    send_body = (method == b"GET")
 
     # rate limiting per IP
-    ip = addr[0]
+    ip = writer.get_extra_info("peername")[0]
     burst = args.burst if args.burst is not None else max(1, int(args.rate))
     if not token_bucket_allow(ip, args.rate, burst):
-        conn.sendall(build_response(429,"Too Many Requests",{"Content-Type":"text/plain"}, b"rate limit\n"))
-        return
+        await send(writer, render(RESP_429, keep))
+        return keep
 
-    fs_path = safe_join(root, path)
-    if not fs_path or not os.path.exists(fs_path):
-        conn.sendall(build_response(404,"Not Found",{"Content-Type":"text/html; charset=utf-8"}, b"<!doctype html><h1>404 Not Found</h1>"))
-        return
+    fs_path = safe_join(root, root_sep, path)
+    # one stat per request: decides 404 vs directory vs file, and the file
+    # handler reuses it for the headers and cache validation
+    try:
+        st = os.stat(fs_path) if fs_path else None
+    except OSError:
+        st = None
+    if st is None:
+        await send(writer, render(RESP_404, keep))
+        return keep
 
-    if os.path.isdir(fs_path):
-        body = dir_listing_html(root, path if path.endswith("/") else path + "/", fs_path)
-        headers = {"Content-Type":"text/html; charset=utf-8", "Content-Length": str(len(body))}
-        if not send_body: body = b""
-        conn.sendall(build_response(200,"OK",headers, body))
-        return
+    if stat.S_ISDIR(st.st_mode):
+        body = await asyncio.get_running_loop().run_in_executor(None, dir_listing_html, root, path if path.endswith("/") else path + "/", fs_path)
+        if send_body:
+            await send(writer, build_response(CTYPE_HTML, body, keep_alive=keep))
+        else:
+            await send(writer, build_response(CTYPE_HTML, length=len(body), keep_alive=keep))
+        return keep
 
     # increment hits (for files)
     # key must match what listing uses
     req_key = path
+    counts, lock = hit_shard(req_key)
     if args.counter_mode == "naive":
-        # race-prone on purpose
-        current = hit_counter.get(req_key, 0)
-        if args.counter_sleep: time.sleep(args.counter_sleep)
-        hit_counter[req_key] = current + 1
+        # race-prone on purpose: other handlers run while we sleep
+        current = counts[req_key]
+        if args.counter_sleep: await asyncio.sleep(args.counter_sleep)
+        counts[req_key] = current + 1
+    elif not args.counter_sleep:
+        # nothing yields between read and write, so the increment is
+        # atomic on the loop thread and needs no lock
+        counts[req_key] += 1
     else:
-        with counter_lock:
-            current = hit_counter.get(req_key, 0)
-            if args.counter_sleep: time.sleep(args.counter_sleep)
-            hit_counter[req_key] = current + 1
-
-    ext = os.path.splitext(fs_path)[1].lower()
-    if ext not in ALLOWED_MIME:
-        conn.sendall(build_response(404,"Not Found",{"Content-Type":"text/html; charset=utf-8"}, b"<!doctype html><h1>404 Not Found</h1><p>Unknown type</p>"))
-        return
-
-    size = os.path.getsize(fs_path)
-    headers = {
-        "Content-Type": ALLOWED_MIME[ext],
-        "Last-Modified": formatdate(os.path.getmtime(fs_path), usegmt=True),
-        "Content-Length": str(size),
-    }
-    if not send_body:
-        conn.sendall(build_response(200,"OK",headers, b""))
-        return
-    with open(fs_path, "rb") as f:
-        content = f.read()
-    conn.sendall(build_response(200,"OK",headers, content))
+        async with lock:
+            current = counts[req_key]
+            await asyncio.sleep(args.counter_sleep)
+            counts[req_key] = current + 1
+
+    handler = FILE_HANDLERS.get(os.path.splitext(fs_path)[1].lower())
+    if handler is None:
+        await send(writer, render(RESP_404_TYPE, keep))
+        return keep
+    await handler(writer, fs_path, st, send_body, keep)
+    return keep
+
+async def handle_conn(reader, writer, root, root_sep, args):
+    # asyncio already sets TCP_NODELAY on accepted TCP sockets
+    sock = writer.get_extra_info("socket")
+    if sock is not None and PIN_SEND_BUFFER:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+    try:
+        for n in range(1, KEEPALIVE_MAX + 1):
+            if not await handle_request(reader, writer, root, root_sep, args, last=(n == KEEPALIVE_MAX)):
+                break
+    except ConnectionError:
+        pass  # client went away mid-response
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve_async(root, root_sep, host, port, workers, args):
+    # one thread multiplexes every socket; the pool only runs blocking disk work
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers))
+    server = await asyncio.start_server(
+        lambda r, w: handle_conn(r, w, root, root_sep, args),
+        host, port, reuse_address=True, reuse_port=hasattr(socket, "SO_REUSEPORT"),
+        backlog=LISTEN_BACKLOG)
+    async with server:
+        await server.serve_forever()
 
 def serve(root, host, port, workers, args):
     root = os.path.abspath(root)
+    root_sep = root if root.endswith(os.sep) else root + os.sep
     print(f"Serving {root} on {host}:{port}  workers={workers}  delay={args.delay}s  counter={args.counter_mode}  rate={args.rate}/s")
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s, ThreadPoolExecutor(max_workers=workers) as pool:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind((host, port))
-        s.listen(workers * 2) #ensures multiple 
-        #clients can connect simultaneously instead of queuing at the TCP handshake.
-        while True:
-            conn, addr = s.accept()
-            pool.submit(handle_request, conn, addr, root, args)
+    asyncio.run(serve_async(root, root_sep, host, port, workers, args))
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Concurrent HTTP file server")
     p.add_argument("root", help="directory to serve")
     p.add_argument("--host", default="0.0.0.0")
     p.add_argument("--port", type=int, default=8001)
-    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--workers", type=int, default=8, help="threads for blocking disk reads")
     p.add_argument("--delay", type=float, default=0.0, help="per-request artificial delay (sec)")
     p.add_argument("--counter-mode", choices=["naive","locked"], default="locked")
     p.add_argument("--counter-sleep", type=float, default=0.0, help="extra sleep inside counter update (to show races)")
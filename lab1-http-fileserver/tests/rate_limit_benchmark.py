@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import argparse, time, statistics
 from collections import defaultdict
-import requests, threading
+import threading
+from rawhttp import RawHTTP
 
 def hammer(label, url, rps, duration, timeout, results):
-    sess = requests.Session()
+    conn = RawHTTP(url, timeout)
     stop = time.perf_counter() + duration
     period = 1.0 / float(rps)
     sent = ok = rl = other = 0
@@ -17,18 +18,19 @@ def hammer(label, url, rps, duration, timeout, results):
             time.sleep(max(0.0, next_at - now))
         t0 = time.perf_counter()
         try:
-            r = sess.get(url, timeout=timeout)
+            code = conn.get()
             dt = time.perf_counter() - t0
             sent += 1
-            if r.status_code == 200:
+            if code == 200:
                 ok += 1; lat.append(dt)
-            elif r.status_code == 429:
+            elif code == 429:
                 rl += 1
             else:
                 other += 1
         except Exception:
             other += 1
         next_at += period
+    conn.close()
     results[label]["sent"] += sent
     results[label]["ok"] += ok
     results[label]["rl"] += rl
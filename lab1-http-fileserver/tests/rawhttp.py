@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# minimal keep-alive HTTP/1.1 GET client on a raw socket, shared by the load scripts
+# (requests/urllib3 spend more CPU per request than the server does, capping the RPS we can generate)
+import socket, urllib.parse
+
+class RawHTTP:
+    def __init__(self, url, timeout):
+        u = urllib.parse.urlsplit(url)
+        self.addr = (u.hostname, u.port or 80)
+        path = (u.path or "/") + ("?" + u.query if u.query else "")
+        self.request = f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\n\r\n".encode("ascii")
+        self.timeout = timeout
+        self.sock = None
+        self.buf = bytearray()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def get(self):
+        """Send one GET, read the whole response off the wire and return the status code.
+        The connection is reused until the server answers with Connection: close."""
+        reused = self.sock is not None
+        try:
+            return self._roundtrip()
+        except ConnectionError:
+            self.close()
+            if not reused:
+                raise
+        except Exception:
+            self.close()
+            raise
+        # the server may have closed the idle keep-alive socket (its idle timeout);
+        # retry once on a fresh connection, like requests.Session does
+        try:
+            return self._roundtrip()
+        except Exception:
+            self.close()
+            raise
+
+    def _roundtrip(self):
+        if self.sock is None:
+            self.sock = socket.create_connection(self.addr, timeout=self.timeout)
+            self.buf.clear()
+        self.sock.sendall(self.request)
+        return self._read_response()
+
+    def _recv(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        return chunk
+
+    def _read_response(self):
+        start = 0
+        while (idx := self.buf.find(b"\r\n\r\n", max(0, start - 3))) < 0:
+            start = len(self.buf)
+            self.buf += self._recv()
+        lines = bytes(self.buf[:idx]).split(b"\r\n")
+        del self.buf[:idx + 4]
+        code = int(lines[0].split(b" ", 2)[1])
+        length, close = 0, False
+        for line in lines[1:]:
+            k, _, v = line.partition(b":")
+            k = k.strip().lower()
+            if k == b"content-length":
+                length = int(v)
+            elif k == b"connection":
+                close = v.strip().lower() == b"close"
+        # skip the body without keeping it
+        if len(self.buf) >= length:
+            del self.buf[:length]
+        else:
+            remaining = length - len(self.buf)
+            self.buf.clear()
+            while remaining > 0:
+                chunk = self._recv()
+                if len(chunk) > remaining:
+                    self.buf += chunk[remaining:]
+                remaining -= len(chunk)
+        if close:
+            self.close()
+        return code
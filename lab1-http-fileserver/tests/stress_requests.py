@@ -1,18 +1,23 @@
 #generates many concurrent GETs using Python threads to validate concurrency 
 #!/usr/bin/env python3
-import requests, time
+import threading, time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from rawhttp import RawHTTP
 
 URL = "http://localhost:8001/books/"  # change if needed
 TOTAL = 40
 CONCURRENCY = 8
 TIMEOUT = 10
+local = threading.local()   # one keep-alive connection per worker thread
 
 def one(i):
+    conn = getattr(local, "conn", None)
+    if conn is None:
+        conn = local.conn = RawHTTP(URL, TIMEOUT)
     t0 = time.perf_counter()
-    r = requests.get(URL, timeout=TIMEOUT)
+    code = conn.get()
     dt = time.perf_counter() - t0
-    return (i, r.status_code, dt)
+    return (i, code, dt)
 
 def main():
     t0 = time.perf_counter()